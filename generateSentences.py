@@ -1,16 +1,15 @@
 import argparse
+import functools
 import json
 
-from enum import Enum, auto
-import math
-import re
-from typing import List, Dict
-from numpy import single
-from pydantic import BaseModel
+from dataclasses import dataclass, field
+from enum import Enum, IntEnum, auto
+from typing import List, Dict, Tuple
+from pydantic import BaseModel, PrivateAttr
 
 import random
 
-class WordType(Enum):
+class WordType(IntEnum):
     Question = auto()
     Pronoun = auto()
     Verb = auto()
@@ -24,34 +23,48 @@ class PronounName(str, Enum):
     YouPlural = "Вы"
     They = "Они"
 
-class VerbQuestion(Enum):
+class VerbQuestion(IntEnum):
     ToWhom = auto()
     Whom = auto()
     WithWhom = auto()
     AboutWhom = auto()
 
-class SingleOrPlural(Enum):
+class SingleOrPlural(IntEnum):
     Singular = auto()
     Plural = auto()
 
-class ConjugationType(Enum):
+class ConjugationType(IntEnum):
     Infinitive = 3
     First = 0
     Second = 1
     Third = 2
 
-class WordForm(BaseModel):
+@dataclass(slots=True, frozen=True)
+class WordForm:
     conjugationType: ConjugationType
     singleOrPlural: SingleOrPlural | None = None
 
 class Word(BaseModel):
     type: WordType
+    _text: str = PrivateAttr(default="")
+    _capitalizedText: str = PrivateAttr(default="")
+    _index: int = PrivateAttr(default=0)
+
+    def lowercaseText(self) -> str:
+        raise NotImplementedError
 
 class QuestionWord(Word):
     text: str
 
+    def lowercaseText(self) -> str:
+        return self.text.lower()
+
 class PronounWord(Word):
     pronounName: PronounName
+    _form: WordForm | None = PrivateAttr(default=None)
+
+    def lowercaseText(self) -> str:
+        return self.pronounName.value.lower()
 
 class Conjugation(BaseModel):
     singular: str
@@ -65,39 +78,30 @@ class VerbWord(Word):
     forms: VerbForms
     expectInfinitive: bool
     questions: List[VerbQuestion]
+    _textInForm: Dict[Tuple[ConjugationType, SingleOrPlural | None], str] = PrivateAttr(default_factory=dict)
+
+    def lowercaseText(self) -> str:
+        return self.forms.infinitive.lower()
 
 class Words(BaseModel):
     questionWords: List[QuestionWord] = []
     pronouns: List[PronounWord] = []
     verbs: List[VerbWord] = []
-
-def textLowercase(func):
-    return lambda *args, **kwargs: func(*args, **kwargs).lower()
-
-@textLowercase
-def wordText(word: Word) -> str:
-    match (word):
-        case QuestionWord(text=text):
-            return text
-        case PronounWord(pronounName=pronounName):
-            return pronounName.value
-        case VerbWord(forms=forms):
-            return forms.infinitive
-
-def pronounForm(pronoun: PronounWord) -> WordForm:
-    match(pronoun.pronounName):
-        case PronounName.I:
-            return WordForm(conjugationType=ConjugationType.First, singleOrPlural=SingleOrPlural.Singular)
-        case PronounName.You:
-            return WordForm(conjugationType=ConjugationType.Second, singleOrPlural=SingleOrPlural.Singular)
-        case PronounName.He | PronounName.She:
-            return WordForm(conjugationType=ConjugationType.Third, singleOrPlural=SingleOrPlural.Singular)
-        case PronounName.We:
-            return WordForm(conjugationType=ConjugationType.First, singleOrPlural=SingleOrPlural.Plural)
-        case PronounName.YouPlural:
-            return WordForm(conjugationType=ConjugationType.Second, singleOrPlural=SingleOrPlural.Plural)
-        case PronounName.They:
-            return WordForm(conjugationType=ConjugationType.Third, singleOrPlural=SingleOrPlural.Plural)
+    _verbsExpectInfinitive: List[VerbWord] = PrivateAttr(default_factory=list)
+    _verbsNotExpectInfinitive: List[VerbWord] = PrivateAttr(default_factory=list)
+
+_PRONOUN_NAMES: List[PronounName] = list(PronounName)
+
+_thirdSingularForm = WordForm(conjugationType=ConjugationType.Third, singleOrPlural=SingleOrPlural.Singular)
+_PRONOUN_FORM: Dict[PronounName, WordForm] = {
+    PronounName.I: WordForm(conjugationType=ConjugationType.First, singleOrPlural=SingleOrPlural.Singular),
+    PronounName.You: WordForm(conjugationType=ConjugationType.Second, singleOrPlural=SingleOrPlural.Singular),
+    PronounName.He: _thirdSingularForm,
+    PronounName.She: _thirdSingularForm,
+    PronounName.We: WordForm(conjugationType=ConjugationType.First, singleOrPlural=SingleOrPlural.Plural),
+    PronounName.YouPlural: WordForm(conjugationType=ConjugationType.Second, singleOrPlural=SingleOrPlural.Plural),
+    PronounName.They: WordForm(conjugationType=ConjugationType.Third, singleOrPlural=SingleOrPlural.Plural),
+}
 
 def pronounAtFormOfQuestion(pronounName: PronounName, verbQuestion: VerbQuestion) -> List[str]:
     match verbQuestion:
@@ -138,127 +142,162 @@ def pronounAtFormOfQuestion(pronounName: PronounName, verbQuestion: VerbQuestion
                 case PronounName.She: return ["о", "ней"]
                 case PronounName.They: return ["о", "них"]
 
-@textLowercase
 def verbTextInForm(verb: VerbWord, form: WordForm) -> str:
-    match form.conjugationType:
-        case ConjugationType.Infinitive:
-            return verb.forms.infinitive
-        case _:
-            conjugation = verb.forms.conjugations[form.conjugationType.value]
-            return conjugation.singular if form.singleOrPlural == SingleOrPlural.Singular else conjugation.plural
+    return verb._textInForm[(form.conjugationType, form.singleOrPlural)]
+
+def cacheWordTexts(words: Words):
+    for wordList in [words.questionWords, words.pronouns, words.verbs]:
+        for index, word in enumerate(wordList):
+            word._index = index
+            word._text = word.lowercaseText()
+            word._capitalizedText = word._text[:1].upper() + word._text[1:]
+
+    for pronoun in words.pronouns:
+        pronoun._form = _PRONOUN_FORM[pronoun.pronounName]
+
+    for verb in words.verbs:
+        verb._textInForm[(ConjugationType.Infinitive, None)] = verb._text
+        for conjugationType in ConjugationType:
+            if conjugationType is ConjugationType.Infinitive:
+                continue
+            conjugation = verb.forms.conjugations[conjugationType.value]
+            verb._textInForm[(conjugationType, SingleOrPlural.Singular)] = conjugation.singular.lower()
+            verb._textInForm[(conjugationType, SingleOrPlural.Plural)] = conjugation.plural.lower()
+
+def partitionVerbs(words: Words):
+    for verb in words.verbs:
+        if verb.expectInfinitive:
+            words._verbsExpectInfinitive.append(verb)
+        else:
+            words._verbsNotExpectInfinitive.append(verb)
 
 def makeWordsByText(words: Words) -> Dict[str, Word]:
     wordTextToWord = {}
 
     for wordList in [words.questionWords, words.pronouns, words.verbs]:
         for word in wordList:
-            wordTextToWord[wordText(word)] = word
+            wordTextToWord[word._text] = word
     return wordTextToWord
 
-def randomWordFromList(wordList: List[Word]) -> Word:
-    return wordList[random.randrange(0, len(wordList))]
-
-def newOrAnyWord(wordList: List[Word], wordTextToWord: Dict[str, Word], wordsToLearn: List[str]) -> Word:
-    type = wordList[0].type
-    wordsToLearnOfType = [wordTextToWord[wordText] for wordText in wordsToLearn if wordTextToWord[wordText].type == type]
-    if len(wordsToLearnOfType) > 0:
-        return randomWordFromList(wordsToLearnOfType)
-    return randomWordFromList(wordList)
-
-def newOrAnyVerb(verbList: List[Word], wordTextToWord: Dict[str, Word], wordsToLearn: List[str]) -> Word:
-    verbsToLearn = [wordTextToWord[wordText] for wordText in wordsToLearn if wordTextToWord[wordText].type == WordType.Verb]
+@dataclass
+class LearnIndex:
+    byType: Dict[WordType, List[Word]] = field(default_factory=lambda: {wordType: [] for wordType in WordType})
+    verbsExpectInfinitive: List[VerbWord] = field(default_factory=list)
+    verbsNotExpectInfinitive: List[VerbWord] = field(default_factory=list)
+
+def makeLearnIndex(wordTextToWord: Dict[str, Word], wordsToLearn: List[str]) -> LearnIndex:
+    learnIndex = LearnIndex()
+
+    for text in wordsToLearn:
+        word = wordTextToWord[text]
+        learnIndex.byType[word.type].append(word)
+        if word.type is WordType.Verb:
+            if word.expectInfinitive:
+                learnIndex.verbsExpectInfinitive.append(word)
+            else:
+                learnIndex.verbsNotExpectInfinitive.append(word)
+    return learnIndex
+
+def randomWordFromList(wordList: List[Word], rng: random.Random) -> Word:
+    return rng.choice(wordList)
+
+def newOrAnyWord(wordList: List[Word], learnIndex: LearnIndex, rng: random.Random) -> Word:
+    return randomWordFromList(learnIndex.byType[wordList[0].type] or wordList, rng)
+
+def newOrAnyVerb(words: Words, learnIndex: LearnIndex, rng: random.Random) -> VerbWord:
+    verbsToLearn = learnIndex.byType[WordType.Verb]
     if len(verbsToLearn) > 0:
-        if any([verb for verb in verbsToLearn if verb.expectInfinitive]) or bool(random.getrandbits(1)):
-            return randomWordFromList(verbsToLearn)
+        if len(learnIndex.verbsExpectInfinitive) > 0 or bool(rng.getrandbits(1)):
+            return randomWordFromList(verbsToLearn, rng)
         else:
-            return randomWordFromList([verb for verb in verbList if verb.expectInfinitive])
-    return randomWordFromList(verbList)
-
-def newOrAnyNotExpectsInfinitiveVerb(verbList: List[VerbWord], wordTextToWord: Dict[str, Word], wordsToLearn: List[str]) -> VerbWord:
-    verbsToLearn = [wordTextToWord[wordText] for wordText in wordsToLearn if wordTextToWord[wordText].type == WordType.Verb and not wordTextToWord[wordText].expectInfinitive]
-    if len(verbsToLearn) > 0:
-        return randomWordFromList(verbsToLearn)
-    return randomWordFromList([verb for verb in verbList if not verb.expectInfinitive])
-
-class NextPartType(Enum):
-    Word = auto()
-    VerbQuestion = auto()
-
-class NextPart(BaseModel):
-    type: NextPartType
-    wordType: WordType | None = None
-    wordForm: WordForm | None = None
+            return randomWordFromList(words._verbsExpectInfinitive, rng)
+    return randomWordFromList(words.verbs, rng)
+
+def newOrAnyNotExpectsInfinitiveVerb(words: Words, learnIndex: LearnIndex, rng: random.Random) -> VerbWord:
+    return randomWordFromList(learnIndex.verbsNotExpectInfinitive or words._verbsNotExpectInfinitive, rng)
+
+@dataclass(slots=True, frozen=True)
+class SentenceParts:
+    pronounIndex: int
+    verbIndex: int
+    questionWordIndex: int | None = None
+    infinitiveVerbIndex: int | None = None
     verbQuestion: VerbQuestion | None = None
-
-class SentenceGenerator:
-    def __init__(self, startWithQuestion: bool) -> None:
-        self.startWithQuestion = startWithQuestion
-        self.sentence = []    
-        if self.startWithQuestion:
-            self.nextPart = NextPart(type=NextPartType.Word, wordType=WordType.Question)
+    verbQuestionPronounName: PronounName | None = None
+
+_QUESTION_STATE, _PRONOUN_STATE, _VERB_STATE, _INFINITIVE_STATE, _VERB_QUESTION_STATE, _DONE_STATE = range(6)
+
+def sampleSentence(words: Words, learnIndex: LearnIndex, rng: random.Random) -> SentenceParts:
+    startWithQuestion = len(learnIndex.byType[WordType.Question]) > 0 or bool(rng.getrandbits(1))
+
+    questionWordIndex = None
+    infinitiveVerbIndex = None
+    verbQuestion = None
+    verbQuestionPronounName = None
+    state = _QUESTION_STATE if startWithQuestion else _PRONOUN_STATE
+    while state != _DONE_STATE:
+        if state == _QUESTION_STATE:
+            questionWordIndex = newOrAnyWord(words.questionWords, learnIndex, rng)._index
+            state = _PRONOUN_STATE
+        elif state == _PRONOUN_STATE:
+            pronounIndex = newOrAnyWord(words.pronouns, learnIndex, rng)._index
+            state = _VERB_STATE
+        elif state == _VERB_STATE:
+            verb = newOrAnyVerb(words, learnIndex, rng)
+            verbIndex = verb._index
+            nextOptionsCount = len(verb.questions) + (1 if verb.expectInfinitive else 0)
+            if nextOptionsCount > 0:
+                option = rng.randrange(nextOptionsCount)
+                if option < len(verb.questions):
+                    verbQuestion = verb.questions[option]
+                    state = _VERB_QUESTION_STATE
+                else:
+                    state = _INFINITIVE_STATE
+            else:
+                state = _DONE_STATE
+        elif state == _INFINITIVE_STATE:
+            verb = newOrAnyNotExpectsInfinitiveVerb(words, learnIndex, rng)
+            infinitiveVerbIndex = verb._index
+            if len(verb.questions) > 0 and bool(rng.getrandbits(1)):
+                verbQuestion = rng.choice(verb.questions)
+                state = _VERB_QUESTION_STATE
+            else:
+                state = _DONE_STATE
         else:
-            self.nextPart = NextPart(type=NextPartType.Word, wordType=WordType.Pronoun)
-    
-    def generateNextPart(self, words: Words, wordTextToWord: Dict[str, Word], wordsToLearn: List[str]) -> bool:
-        match self.nextPart.type:
-            case NextPartType.Word:
-                match self.nextPart.wordType:
-                    case WordType.Question:
-                        self.sentence.append(wordText(
-                            newOrAnyWord(words.questionWords, wordTextToWord, wordsToLearn)
-                        ))
-                        self.nextPart = NextPart(type=NextPartType.Word, wordType=WordType.Pronoun)
-                    case WordType.Pronoun:
-                        pronoun = newOrAnyWord(words.pronouns, wordTextToWord, wordsToLearn)
-                        self.sentence.append(wordText(pronoun))
-                        self.nextPart = NextPart(type=NextPartType.Word, wordType=WordType.Verb, wordForm=pronounForm(pronoun))
-                    case WordType.Verb:
-                        wordForm = self.nextPart.wordForm
-                        if wordForm.conjugationType == ConjugationType.Infinitive:
-                            newVerb = newOrAnyNotExpectsInfinitiveVerb(words.verbs, wordTextToWord, wordsToLearn)
-                            self.sentence.append(wordText(newVerb))
-
-                            if len(newVerb.questions) > 0 and bool(random.getrandbits(1)):
-                                option = random.randrange(0, len(newVerb.questions))
-                                self.nextPart = NextPart(type=NextPartType.VerbQuestion, verbQuestion=newVerb.questions[option])
-                            else:
-                                self.nextPart = None
-                        else:
-                            newVerb: VerbWord = newOrAnyVerb(words.verbs, wordTextToWord, wordsToLearn)
-                            self.sentence.append(verbTextInForm(newVerb, wordForm))
-                            nextOptionsCount = len(newVerb.questions) + (1 if newVerb.expectInfinitive else 0)
-                            if nextOptionsCount > 0:
-                                option = random.randrange(0, nextOptionsCount)
-                                if option < len(newVerb.questions):
-                                    self.nextPart = NextPart(type=NextPartType.VerbQuestion, verbQuestion=newVerb.questions[option])
-                                else:
-                                    self.nextPart = NextPart(type=NextPartType.Word, wordType=WordType.Verb, wordForm=WordForm(conjugationType=ConjugationType.Infinitive))
-                            else:
-                                self.nextPart = None
-            case NextPartType.VerbQuestion:
-                pronounName = list(PronounName)[random.randrange(0, len(PronounName))]
-                words = pronounAtFormOfQuestion(pronounName, self.nextPart.verbQuestion)
-                self.sentence += words
-                self.nextPart = None
-        return self.nextPart != None
-
-def generateSentence(words: Words, wordTextToWord: Dict[str, Word], wordsToLearn: List[str]):
-    startWithQuestion = any(
-        [wordTextToWord[wordText].type == WordType.Question for wordText in wordsToLearn]
-    ) or bool(random.getrandbits(1))
-    
-    sentenceGenerator = SentenceGenerator(startWithQuestion)
-    while sentenceGenerator.generateNextPart(words, wordTextToWord, wordsToLearn):
-        pass
-
-    sentence = sentenceGenerator.sentence
-
-    sentence[0] = sentence[0].capitalize()
+            verbQuestionPronounName = rng.choice(_PRONOUN_NAMES)
+            state = _DONE_STATE
+
+    return SentenceParts(
+        pronounIndex=pronounIndex,
+        verbIndex=verbIndex,
+        questionWordIndex=questionWordIndex,
+        infinitiveVerbIndex=infinitiveVerbIndex,
+        verbQuestion=verbQuestion,
+        verbQuestionPronounName=verbQuestionPronounName
+    )
+
+def renderSentence(words: Words, parts: SentenceParts) -> str:
+    pronoun = words.pronouns[parts.pronounIndex]
+
+    sentence = []
+    if parts.questionWordIndex is not None:
+        sentence.append(words.questionWords[parts.questionWordIndex]._capitalizedText)
+        sentence.append(pronoun._text)
+    else:
+        sentence.append(pronoun._capitalizedText)
+    sentence.append(verbTextInForm(words.verbs[parts.verbIndex], pronoun._form))
+    if parts.infinitiveVerbIndex is not None:
+        sentence.append(words.verbs[parts.infinitiveVerbIndex]._text)
+    if parts.verbQuestion is not None:
+        sentence += pronounAtFormOfQuestion(parts.verbQuestionPronounName, parts.verbQuestion)
+
     return " ".join(sentence)
 
 def parseAgrs():
     parser = argparse.ArgumentParser(description='generate sentences')
     parser.add_argument('--wordsConfig', help='path to config with words', type=str, required=True)    
+    parser.add_argument('--count', help='number of sentences to generate', type=int, default=1)
+    parser.add_argument('--seed', help='random seed to make the output repeatable', type=int)
     args = parser.parse_args()
     return args    
 
@@ -270,25 +309,40 @@ def main():
 
     words = Words()
     for questionWord in config["words"]["questionWords"]:
-        words.questionWords.append(QuestionWord(type = WordType.Question, **questionWord))
+        words.questionWords.append(QuestionWord.model_construct(type = WordType.Question, **questionWord))
     for pronounName in PronounName:
-        words.pronouns.append(PronounWord(type = WordType.Pronoun, pronounName=pronounName))
+        words.pronouns.append(PronounWord.model_construct(type = WordType.Pronoun, pronounName=pronounName))
     for verb in config["words"]["verbs"]:
-        verb["questions"] = [VerbQuestion[question] for question in verb["questions"]]
-        words.verbs.append(VerbWord(type = WordType.Verb, **verb))
+        forms = verb["forms"]
+        words.verbs.append(VerbWord.model_construct(
+            type = WordType.Verb,
+            forms = VerbForms.model_construct(
+                infinitive=forms["infinitive"],
+                conjugations=[Conjugation.model_construct(**conjugation) for conjugation in forms["conjugations"]]
+            ),
+            expectInfinitive=verb["expectInfinitive"],
+            questions=[VerbQuestion[question] for question in verb["questions"]]
+        ))
+    cacheWordTexts(words)
+    partitionVerbs(words)
     wordTextToWord = makeWordsByText(words)
 
     learn = config["learn"]
     wordsToLearn: List[str] = learn["words"]
     wordsToLearn = [word.lower() for word in wordsToLearn]
 
-    sentence = generateSentence(
-        words,
-        wordTextToWord,
-        random.sample(wordsToLearn, min(len(wordsToLearn), 2))
-    )
+    rng = random.Random(args.seed)
+    render = functools.lru_cache(maxsize=None)(functools.partial(renderSentence, words))
+
+    sentences = []
+    for _ in range(args.count):
+        learnIndex = makeLearnIndex(
+            wordTextToWord,
+            rng.sample(wordsToLearn, min(len(wordsToLearn), 2))
+        )
+        sentences.append(render(sampleSentence(words, learnIndex, rng)))
 
-    print(sentence)
+    print("\n".join(sentences))
 
 
 if __name__ == "__main__":